@@ -1,10 +1,12 @@
+import re
 import streamlit as st
 import joblib
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 import numpy as np
+import pandas as pd
+import onnxruntime as ort
+from skl2onnx import to_onnx
 import sklearn.compose._column_transformer
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
 # Monkeypatch for _RemainderColsList
 if not hasattr(sklearn.compose._column_transformer, '_RemainderColsList'):
@@ -26,10 +28,11 @@ st.set_page_config(
 # ============================================================
 #                      CUSTOM CSS STYLING
 # ============================================================
-st.markdown("""
+CUSTOM_CSS = """
+<link rel="preconnect" href="https://fonts.googleapis.com">
+<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+<link href="https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap" rel="stylesheet">
 <style>
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap');
-
     html, body, [class*="css"] {
         font-family: 'Poppins', sans-serif;
         color: #0f172a;
@@ -138,8 +141,42 @@ st.markdown("""
     .risk-moderate { background: linear-gradient(135deg, #f59e0b 0%, #d97706 100%); }
     .risk-high { background: linear-gradient(135deg, #ef4444 0%, #b91c1c 100%); }
 
+    /* Result Layout */
+    .result-grid {
+        display: grid;
+        grid-template-columns: 1fr 1.5fr;
+        gap: 20px;
+        align-items: start;
+    }
+
+    /* Metric Tiles */
+    .metric-grid {
+        grid-column: 1 / -1;
+        display: grid;
+        grid-template-columns: repeat(4, 1fr);
+        gap: 16px;
+        margin-top: 10px;
+        animation: fadeIn 0.8s ease-out;
+    }
+    .metric-tile {
+        background: rgba(255, 255, 255, 0.8);
+        border-radius: 15px;
+        padding: 15px 20px;
+    }
+    .metric-label { font-size: 0.9rem; color: #475569; }
+    .metric-value { font-size: 2rem; font-weight: 600; color: #0f172a; }
+    .metric-delta { font-size: 0.9rem; font-weight: 500; }
+    .delta-ok { color: #059669; }
+    .delta-alert { color: #dc2626; }
+
+    /* Stack the result and metric grids on narrow screens */
+    @media (max-width: 640px) {
+        .result-grid { grid-template-columns: 1fr; }
+        .metric-grid { grid-template-columns: repeat(2, 1fr); }
+    }
+
     /* Button */
-    div.stButton > button {
+    div.stButton > button, div.stFormSubmitButton > button {
         background: linear-gradient(90deg, #4f46e5 0%, #7c3aed 100%);
         color: white;
         border: none;
@@ -152,24 +189,196 @@ st.markdown("""
         transition: all 0.3s ease;
         animation: fadeIn 1s ease-out;
     }
-    div.stButton > button:hover {
+    div.stButton > button:hover, div.stFormSubmitButton > button:hover {
         transform: translateY(-2px);
         box-shadow: 0 8px 20px rgba(79, 70, 229, 0.4);
     }
 </style>
+"""
+
+
+@st.cache_data
+def load_css(css):
+    # Streamlit drops elements that are not re-emitted, so the style block is sent on every
+    # rerun; strip comments and indentation once to keep that payload small. The CSS is an
+    # argument so edits to CUSTOM_CSS change the cache key instead of serving a stale sheet.
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    return re.sub(r"\s+", " ", css).strip()
+
 
-""", unsafe_allow_html=True)
+st.markdown(load_css(CUSTOM_CSS), unsafe_allow_html=True)
 
 
 # ============================================================
 #                      LOAD MODEL
 # ============================================================
+# Raw fields collected from the form, in the order they are filled in
+RAW_COLUMNS = [
+    'age_years', 'height', 'weight', 'ap_hi', 'ap_lo',
+    'gender', 'cholesterol', 'gluc', 'smoke', 'active', 'alco'
+]
+
+# Feature order expected by the pipeline's ColumnTransformer
+FEATURE_COLUMNS = [
+    'age_years', 'height', 'weight', 'ap_hi', 'ap_lo', 'bmi', 'bp_diff',
+    'gender', 'cholesterol', 'gluc', 'smoke', 'active', 'alco', 'bmi_cat'
+]
+
+# BMI category boundaries: underweight / normal / overweight / obese
+_BMI_EDGES = np.array([18.5, 25.0, 30.0])
+
+
+# Column positions within the engineered feature matrix
+_FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_COLUMNS)}
+_RAW_POSITIONS = [_FEATURE_INDEX[name] for name in RAW_COLUMNS]
+
+
+def engineer_features(raw):
+    """Build the model's feature matrix from raw input rows ordered as RAW_COLUMNS."""
+    # Column-major so every feature is a contiguous array
+    features = np.empty((len(raw), len(FEATURE_COLUMNS)), dtype=np.float64, order='F')
+    features[:, _RAW_POSITIONS] = raw
+
+    # Derived columns are written in place through out= views, so batches allocate no temporaries
+    bmi = features[:, _FEATURE_INDEX['bmi']]
+    np.divide(features[:, _FEATURE_INDEX['height']], 100, out=bmi)
+    np.multiply(bmi, bmi, out=bmi)
+    np.divide(features[:, _FEATURE_INDEX['weight']], bmi, out=bmi)
+    np.subtract(features[:, _FEATURE_INDEX['ap_hi']], features[:, _FEATURE_INDEX['ap_lo']],
+                out=features[:, _FEATURE_INDEX['bp_diff']])
+    features[:, _FEATURE_INDEX['bmi_cat']] = np.searchsorted(_BMI_EDGES, bmi, side='right')
+    return features
+
+
 @st.cache_resource
 def load_prediction_model():
-    return joblib.load("cardio_pipeline.pkl")
+    pipeline = joblib.load("cardio_pipeline.pkl")
+    preprocess = pipeline.named_steps["preprocess"]
+    forest = pipeline.named_steps["model"]
+
+    # The ColumnTransformer is a StandardScaler plus a OneHotEncoder; unpack their fitted
+    # state so each request skips its per-call DataFrame validation and column dispatch.
+    # The fast path relies on that exact layout, so refuse any pickle that differs.
+    layout = [
+        (name, trans, cols) for name, trans, cols in preprocess.transformers_
+        if not (name == "remainder" and ((isinstance(trans, str) and trans == "drop") or len(cols) == 0))
+    ]
+    if [name for name, _, _ in layout] != ["num", "cat"]:
+        raise ValueError(f"Unexpected preprocessing layout: {[name for name, _, _ in layout]}")
+    columns = {name: cols for name, _, cols in layout}
+    scaler = preprocess.named_transformers_["num"]
+    encoder = preprocess.named_transformers_["cat"]
+    if not isinstance(scaler, StandardScaler) or not (scaler.with_mean and scaler.with_std):
+        raise ValueError("Numeric step must be a StandardScaler with mean and std scaling")
+    if not isinstance(encoder, OneHotEncoder) or encoder.handle_unknown != "ignore" or any(
+        param is not None for param in (encoder.drop, encoder.min_frequency, encoder.max_categories)
+    ):
+        raise ValueError(
+            "Categorical step must be a OneHotEncoder with handle_unknown='ignore' "
+            "and no drop or infrequent grouping"
+        )
+    num_idx = [_FEATURE_INDEX[name] for name in columns["num"]]
+    cat_idx = [_FEATURE_INDEX[name] for name in columns["cat"]]
+    mean = np.array(scaler.mean_, dtype=np.float64)
+    scale = np.array(scaler.scale_, dtype=np.float64)
+    categories = [np.array(cats, dtype=np.float64) for cats in encoder.categories_]
+    n_inputs = len(num_idx) + sum(len(cats) for cats in categories)
+    if n_inputs != forest.n_features_in_:
+        raise ValueError(f"Preprocessing yields {n_inputs} features, model expects {forest.n_features_in_}")
+
+    # Compile the Random Forest to ONNX once per process; onnxruntime walks the trees natively
+    onnx_model = to_onnx(
+        forest,
+        np.zeros((1, forest.n_features_in_), dtype=np.float32),
+        options={id(forest): {"zipmap": False}},
+    )
+    session = ort.InferenceSession(onnx_model.SerializeToString(), providers=["CPUExecutionProvider"])
+
+    def predict_proba(raw):
+        """Class probabilities for raw input rows ordered as RAW_COLUMNS."""
+        features = engineer_features(raw)
+        X = np.empty((len(features), n_inputs), dtype=np.float32)
+        X[:, :len(num_idx)] = (features[:, num_idx] - mean) / scale
+        offset = len(num_idx)
+        for idx, cats in zip(cat_idx, categories):
+            # Unknown values match no category and stay all-zero, as with handle_unknown='ignore'
+            X[:, offset:offset + len(cats)] = features[:, [idx]] == cats
+            offset += len(cats)
+        return session.run(["probabilities"], {"X": X})[0]
+
+    # Warm the fast path with the form's default inputs so the first user click is not a cold call,
+    # and check it against the saved pipeline so a mismatch fails here rather than in front of users
+    warmup = np.array([[45, 165, 70, 120, 80, 1, 1, 1, 0, 1, 0]], dtype=np.float64)
+    expected = pipeline.predict_proba(pd.DataFrame(engineer_features(warmup), columns=FEATURE_COLUMNS))
+    if not np.allclose(predict_proba(warmup), expected, atol=1e-5):
+        raise ValueError("Fast prediction path disagrees with the saved pipeline")
+    return predict_proba
+
+
+# (label, css class, emoji, message) per risk bucket: <35%, 35-65%, >=65%
+RISK_LEVELS = [
+    ("Low Risk", "risk-low", "🛡️", "Great job! Maintain your healthy lifestyle."),
+    ("Moderate Risk", "risk-moderate", "⚠️", "Warning: Consider lifestyle improvements."),
+    ("High Risk", "risk-high", "🚨", "Action Required: Seek medical advice."),
+]
+
+# Badge HTML per risk bucket, pre-rendered so only the probability is formatted per request
+_BADGE_HTML = """
+    <div class="risk-badge {css}">
+        <h1 style="color:white; margin:0; font-size: 3rem;">{emoji}</h1>
+        <h2 style="color:white; margin:10px 0;">{label}</h2>
+        <h3 style="color:rgba(255,255,255,0.9);">%.1f%%</h3>
+        <p style="color:rgba(255,255,255,0.8);">{msg}</p>
+    </div>
+"""
+RISK_BADGES = [
+    _BADGE_HTML.format(label=label, css=css, emoji=emoji, msg=msg)
+    for label, css, emoji, msg in RISK_LEVELS
+]
+
+RADAR_CATEGORIES = ['Age', 'BMI', 'BP', 'Cholesterol', 'Glucose']
+
+
+# Radar geometry in SVG units: first axis at 12 o'clock, then clockwise
+_RADAR_CENTER = 150.0
+_RADAR_RADIUS = 100.0
+_RADAR_ANGLES = np.pi / 2 - 2 * np.pi * np.arange(len(RADAR_CATEGORIES)) / len(RADAR_CATEGORIES)
+_RADAR_UNIT = np.column_stack([np.cos(_RADAR_ANGLES), -np.sin(_RADAR_ANGLES)])
+
+
+def _radar_points(values, radius=_RADAR_RADIUS):
+    points = _RADAR_CENTER + radius * np.asarray(values)[:, None] * _RADAR_UNIT
+    return " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+
+
+# Static rings, spokes and labels; only the value polygon is filled in per request
+_RADAR_SVG = (
+    '<svg viewBox="0 0 300 300" width="100%%" height="300" xmlns="http://www.w3.org/2000/svg">'
+    + "".join(
+        f'<polygon points="{_radar_points(np.full(len(RADAR_CATEGORIES), level))}" fill="none" stroke="#cbd5e1"/>'
+        for level in (0.25, 0.5, 0.75, 1.0)
+    )
+    + "".join(
+        f'<line x1="{_RADAR_CENTER}" y1="{_RADAR_CENTER}" x2="{x:.1f}" y2="{y:.1f}" stroke="#cbd5e1"/>'
+        for x, y in _RADAR_CENTER + _RADAR_RADIUS * _RADAR_UNIT
+    )
+    + "".join(
+        f'<text x="{x:.1f}" y="{y:.1f}" text-anchor="middle" dominant-baseline="middle" '
+        f'font-size="12" fill="#0f172a">{name}</text>'
+        for name, (x, y) in zip(RADAR_CATEGORIES, _RADAR_CENTER + 1.22 * _RADAR_RADIUS * _RADAR_UNIT)
+    )
+    + '<polygon points="%s" fill="#4f46e5" fill-opacity="0.5" stroke="#4f46e5" stroke-width="2"/>'
+    + '</svg>'
+)
+
+
+def radar_svg(values):
+    """Inline SVG radar chart for values normalised to [0, 1]."""
+    return _RADAR_SVG % _radar_points(values)
+
 
 try:
-    model = load_prediction_model()
+    predict_proba = load_prediction_model()
 except Exception as e:
     st.error(f"Error loading model: {e}")
     st.stop()
@@ -193,8 +402,8 @@ main_tab, info_tab, disclaim_tab = st.tabs(["🏥 Risk Assessment", "ℹ️ Syst
 # ============================================================
 with main_tab:
     # ------------------ INPUT SECTION ------------------
-    # Using a container to group inputs visually
-    with st.container():
+    # A form groups the inputs and only reruns the script on submit
+    with st.form("risk_form", clear_on_submit=False, border=False):
         
         # 3 Column Layout for Inputs (Single Page View)
         col_basic, col_vitals, col_life = st.columns(3, gap="large")
@@ -207,9 +416,9 @@ with main_tab:
             height = st.number_input("Height (cm)", 120, 220, 165)
             weight = st.number_input("Weight (kg)", 30, 200, 70)
             
-            # Live BMI Preview
-            current_bmi = weight / ((height / 100) ** 2)
-            st.caption(f"Calculated BMI: **{current_bmi:.1f}**")
+            # BMI Preview (form widgets only send values on submit)
+            bmi = weight / ((height / 100) ** 2)
+            st.caption(f"Calculated BMI: **{bmi:.1f}** (updates when you run the assessment)")
 
         # --- Column 2: Vitals ---
         with col_vitals:
@@ -229,91 +438,72 @@ with main_tab:
             active = st.selectbox("Physical Activity", [0, 1], format_func=lambda x: "No" if x == 0 else "Yes")
             
             st.markdown("<br>", unsafe_allow_html=True) # Spacer
-            predict_btn = st.button("🔍 Run Assessment", use_container_width=True)
+            predict_btn = st.form_submit_button("🔍 Run Assessment", use_container_width=True)
 
     # ------------------ PREDICTION LOGIC ------------------
     if predict_btn:
         st.markdown("---")
         
-        # Feature Engineering
-        bmi = weight / ((height / 100) ** 2)
         bp_diff = ap_hi - ap_lo
+
+        # Single input row, in RAW_COLUMNS order
+        input_row = np.array([[
+            age_years, height, weight, ap_hi, ap_lo,
+            gender, cholesterol, gluc, smoke, active, alco
+        ]], dtype=np.float64)
         
-        if bmi < 18.5: bmi_cat = 0
-        elif bmi < 25: bmi_cat = 1
-        elif bmi < 30: bmi_cat = 2
-        else: bmi_cat = 3
-        
-        input_data = pd.DataFrame([{
-            'age_years': age_years, 'height': height, 'weight': weight,
-            'ap_hi': ap_hi, 'ap_lo': ap_lo, 'bmi': bmi, 'bp_diff': bp_diff,
-            'gender': gender, 'cholesterol': cholesterol, 'gluc': gluc,
-            'smoke': smoke, 'active': active, 'alco': alco, 'bmi_cat': bmi_cat
-        }])
-        
-        prediction = model.predict(input_data)[0]
-        probability = model.predict_proba(input_data)[0][1]
-        confidence = max(model.predict_proba(input_data)[0]) * 100
+        # Single inference pass; the class decision is a threshold on it
+        proba = predict_proba(input_row)[0]
+        prediction = int(proba[1] >= 0.5)
+        probability = proba[1]
+        confidence = proba.max() * 100
 
         # Styles
-        if probability < 0.35:
-            risk_label = "Low Risk"
-            risk_css = "risk-low"
-            emoji = "🛡️"
-            msg = "Great job! Maintain your healthy lifestyle."
-        elif probability < 0.65:
-            risk_label = "Moderate Risk"
-            risk_css = "risk-moderate"
-            emoji = "⚠️"
-            msg = "Warning: Consider lifestyle improvements."
-        else:
-            risk_label = "High Risk"
-            risk_css = "risk-high"
-            emoji = "🚨"
-            msg = "Action Required: Seek medical advice."
-
-        # Result Display with Animation
-        c1, c2 = st.columns([1, 1.5])
-        
-        with c1:
-            st.markdown(f"""
-                <div class="risk-badge {risk_css}">
-                    <h1 style="color:white; margin:0; font-size: 3rem;">{emoji}</h1>
-                    <h2 style="color:white; margin:10px 0;">{risk_label}</h2>
-                    <h3 style="color:rgba(255,255,255,0.9);">{probability*100:.1f}%</h3>
-                    <p style="color:rgba(255,255,255,0.8);">{msg}</p>
-                </div>
-            """, unsafe_allow_html=True)
-            
-        with c2:
-            st.markdown("### Analysis")
-            # Radial Chart using Plotly
-            categories = ['Age', 'BMI', 'BP', 'Cholesterol', 'Glucose']
-            values = [
-                min(age_years/80, 1),
-                min(bmi/40, 1),
-                min(ap_hi/180, 1),
-                cholesterol/3,
-                gluc/3
-            ]
-
-            fig = px.line_polar(r=values, theta=categories, line_close=True, range_r=[0,1])
-            fig.update_traces(fill='toself', line_color='#4f46e5')
-            fig.update_layout(
-                margin=dict(t=20, b=20, l=40, r=40),
-                height=300,
-                polar=dict(
-                    radialaxis=dict(visible=True, range=[0, 1])
-                )
-            )
-            st.plotly_chart(fig, use_container_width=True)
+        risk_level = int(probability >= 0.35) + int(probability >= 0.65)
+
+        # Radial chart values, normalised to [0, 1]
+        values = np.minimum(
+            np.array([age_years, bmi, ap_hi, cholesterol, gluc], dtype=np.float32)
+            / np.array([80, 40, 180, 3, 3], dtype=np.float32),
+            1.0
+        )
 
         # Metrics Row
-        m1, m2, m3, m4 = st.columns(4)
-        m1.metric("BMI Status", f"{bmi:.1f}", "Normal" if 18.5 <= bmi < 25 else "Attention", delta_color="inverse")
-        m2.metric("BP Status", f"{ap_hi}/{ap_lo}", "Elevated" if ap_hi > 120 else "Normal", delta_color="inverse")
-        m3.metric("Pulse Pressure", f"{bp_diff}", "Wide" if bp_diff > 60 else "Normal")
-        m4.metric("AI Confidence", f"{confidence:.0f}%")
+        bmi_ok = 18.5 <= bmi < 25
+        bp_ok = ap_hi <= 120
+        pulse_ok = bp_diff <= 60
+        metrics_html = f"""
+            <div class="metric-grid">
+                <div class="metric-tile">
+                    <div class="metric-label">BMI Status</div>
+                    <div class="metric-value">{bmi:.1f}</div>
+                    <div class="metric-delta {'delta-ok' if bmi_ok else 'delta-alert'}">{'Normal' if bmi_ok else 'Attention'}</div>
+                </div>
+                <div class="metric-tile">
+                    <div class="metric-label">BP Status</div>
+                    <div class="metric-value">{ap_hi}/{ap_lo}</div>
+                    <div class="metric-delta {'delta-ok' if bp_ok else 'delta-alert'}">{'Normal' if bp_ok else 'Elevated'}</div>
+                </div>
+                <div class="metric-tile">
+                    <div class="metric-label">Pulse Pressure</div>
+                    <div class="metric-value">{bp_diff}</div>
+                    <div class="metric-delta {'delta-ok' if pulse_ok else 'delta-alert'}">{'Normal' if pulse_ok else 'Wide'}</div>
+                </div>
+                <div class="metric-tile">
+                    <div class="metric-label">AI Confidence</div>
+                    <div class="metric-value">{confidence:.0f}%</div>
+                </div>
+            </div>
+        """
+
+        # Result Display: badge, radar and metrics in one grid, sent as a single element
+        st.markdown("\n".join([
+            '<div class="result-grid">',
+            RISK_BADGES[risk_level].strip() % (probability * 100,),
+            '<div class="result-analysis"><h3>Analysis</h3>' + radar_svg(values) + '</div>',
+            metrics_html.strip(),
+            '</div>',
+        ]), unsafe_allow_html=True)
 
 
 # ============================================================